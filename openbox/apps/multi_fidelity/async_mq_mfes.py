@@ -206,12 +206,12 @@ class async_mqMFES(async_mqHyperband):
         array_size = len(y_pred)
         assert len(y_true) == array_size
 
-        total_pair_num, order_preserving_num = 0, 0
-        for idx in range(array_size):
-            for inner_idx in range(idx + 1, array_size):
-                if bool(y_true[idx] > y_true[inner_idx]) == bool(y_pred[idx] > y_pred[inner_idx]):
-                    order_preserving_num += 1
-                total_pair_num += 1
+        y_pred, y_true = np.reshape(y_pred, -1), np.reshape(y_true, -1)
+        # A pair (i, j) with i < j preserves the order if the relations in y_true and y_pred agree.
+        true_gt = np.greater.outer(y_true, y_true)
+        pred_gt = np.greater.outer(y_pred, y_pred)
+        order_preserving_num = int(np.count_nonzero(np.triu(true_gt == pred_gt, k=1)))
+        total_pair_num = array_size * (array_size - 1) // 2
         return order_preserving_num, total_pair_num
 
     def update_weight(self):
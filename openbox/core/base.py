@@ -88,8 +88,9 @@ def build_surrogate(func_str='gp', config_space=None, rng=None, transfer_learnin
     elif func_str.startswith('mfgpe'):
         from openbox.surrogate.tlbo.mfgpe import MFGPE
         inner_surrogate_type = 'prf'
+        fusion_method = 'gpoe' if 'gpoe' in func_str else 'idp_lc'
         return MFGPE(config_space, transfer_learning_history, seed,
-                     surrogate_type=inner_surrogate_type, num_src_hpo_trial=-1)
+                     surrogate_type=inner_surrogate_type, num_src_hpo_trial=-1, fusion_method=fusion_method)
     elif func_str.startswith('tlbo'):
         logger.info('The current TL surrogate is %s' % func_str)
         if 'rgpe' in func_str:
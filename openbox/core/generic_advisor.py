@@ -12,6 +12,27 @@ from openbox.acq_optimizer import build_acq_optimizer
 from openbox.core.base_advisor import BaseAdvisor
 
 
+def _max_min_distance(src_array, default_array, num):
+    """
+    Greedily select the indices of num rows in src_array, each maximizing its
+    minimal distance to default_array and the previously selected rows.
+    """
+    selected = np.zeros(src_array.shape[0], dtype=bool)
+    min_dis = np.linalg.norm(src_array - default_array, axis=1)
+
+    selected_idx = list()
+    for _ in range(num):
+        furthest_idx = int(np.argmax(min_dis))
+        selected_idx.append(furthest_idx)
+        selected[furthest_idx] = True
+
+        min_dis = np.minimum(min_dis, np.linalg.norm(src_array - src_array[furthest_idx], axis=1))
+        # Selected rows never win argmax again.
+        min_dis[selected] = -np.inf
+
+    return selected_idx
+
+
 class Advisor(BaseAdvisor):
     """
     Generic Bayesian optimization advisor.
@@ -150,15 +171,11 @@ class Advisor(BaseAdvisor):
         # analyze config space
         cont_types = (UniformFloatHyperparameter, UniformIntegerHyperparameter)
         cat_types = (CategoricalHyperparameter, OrdinalHyperparameter)
-        n_cont_hp, n_cat_hp, n_other_hp = 0, 0, 0
-        for hp in self.config_space.get_hyperparameters():
-            if isinstance(hp, cont_types):
-                n_cont_hp += 1
-            elif isinstance(hp, cat_types):
-                n_cat_hp += 1
-            else:
-                n_other_hp += 1
-        n_total_hp = n_cont_hp + n_cat_hp + n_other_hp
+        hps = self.config_space.get_hyperparameters()
+        n_total_hp = len(hps)
+        n_cont_hp = sum(isinstance(hp, cont_types) for hp in hps)
+        n_cat_hp = sum(isinstance(hp, cat_types) for hp in hps)
+        n_other_hp = n_total_hp - n_cont_hp - n_cat_hp
 
         info_str = ''
 
@@ -374,26 +391,9 @@ class Advisor(BaseAdvisor):
         return valid_configs
 
     def max_min_distance(self, default_config, src_configs, num):
-        min_dis = list()
-        initial_configs = list()
-        initial_configs.append(default_config)
-
-        for config in src_configs:
-            dis = np.linalg.norm(config.get_array() - default_config.get_array())
-            min_dis.append(dis)
-        min_dis = np.array(min_dis)
-
-        for i in range(num):
-            furthest_config = src_configs[np.argmax(min_dis)]
-            initial_configs.append(furthest_config)
-            min_dis[np.argmax(min_dis)] = -1
-
-            for j in range(len(src_configs)):
-                if src_configs[j] in initial_configs:
-                    continue
-                updated_dis = np.linalg.norm(src_configs[j].get_array() - furthest_config.get_array())
-                min_dis[j] = min(updated_dis, min_dis[j])
-
+        src_array = np.vstack([config.get_array() for config in src_configs])
+        selected_idx = _max_min_distance(src_array, default_config.get_array(), num)
+        initial_configs = [default_config] + [src_configs[idx] for idx in selected_idx]
         return initial_configs
 
     def get_suggestion(self, history: History = None, return_list: bool = False):
@@ -487,8 +487,16 @@ class Advisor(BaseAdvisor):
                 # Caution: return_list doesn't contain random configs sampled according to rand_prob
                 return challengers
 
+            # The first challenger is usually new, so a linear scan is enough. The value-based lookup
+            # (same semantics as Configuration.__eq__) is only built once a duplicate shows up.
+            evaluated_configs = history.configurations
+            evaluated_values = None
             for config in challengers:
-                if config not in history.configurations:
+                if evaluated_values is None:
+                    if config not in evaluated_configs:
+                        return config
+                    evaluated_values = {frozenset(c.get_dictionary().items()) for c in evaluated_configs}
+                elif frozenset(config.get_dictionary().items()) not in evaluated_values:
                     return config
             logger.warning('Cannot get non duplicate configuration from BO candidates (len=%d). '
                            'Sample random config.' % (len(challengers), ))
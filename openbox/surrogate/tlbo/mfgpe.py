@@ -2,27 +2,54 @@
 
 import numpy as np
 from typing import List
-from sklearn.model_selection import KFold
+from joblib import Parallel, delayed, cpu_count
+from scipy.stats import kendalltau
 from openbox import logger
+from openbox.core.base import build_surrogate
 from openbox.surrogate.tlbo.base import BaseTLSurrogate
 from openbox.utils.history import History
 
 _scale_method = 'scale'
+_source_pred_cache_size = 16
+# Skip CV if the target weight exceeds the threshold in the last iterations, but refresh it periodically.
+_skip_cv_target_weight = 0.9
+_skip_cv_window = 3
+_skip_cv_refresh_interval = 5
+
+
+def _fit_predict_fold(surrogate_type, config_space, seed, X_train, y_train, X_val):
+    """
+    Fit a target surrogate on one CV fold and predict on its validation samples.
+    Defined at module level so that joblib's process-based backend only pickles the fold data.
+    """
+    model = build_surrogate(surrogate_type, config_space, np.random.RandomState(seed))
+    if (y_train == y_train[0]).all():
+        y_train[0] += 1e-4
+    model.train(X_train, y_train)
+    mu, var = model.predict(X_val)
+    return mu.flatten(), var.flatten()
 
 
 class MFGPE(BaseTLSurrogate):
     def __init__(self, config_space, source_hpo_data, seed,
-                 surrogate_type='rf', num_src_hpo_trial=-1, only_source=False):
+                 surrogate_type='rf', num_src_hpo_trial=-1, only_source=False, fusion_method='idp_lc'):
         super().__init__(config_space, source_hpo_data, seed,
                          surrogate_type=surrogate_type, num_src_hpo_trial=num_src_hpo_trial)
         self.method_id = 'mfgpe'
         self.only_source = only_source
+        # 'idp_lc': fixed weights learned from ranking pairs; 'gpoe': per-point product of experts.
+        if fusion_method not in ['idp_lc', 'gpoe']:
+            raise ValueError('Invalid fusion method %s.' % fusion_method)
+        self.fusion_method = fusion_method
+        # Predictions of base surrogates, keyed on X and then on surrogate index. Cleared when surrogates change.
+        self._source_pred_cache = dict()
         self.build_source_surrogates(normalize=_scale_method)
 
         self.scale = True
 
         self.K = 0
         self.w = None
+        self._W, self._W2 = None, None  # weights (and squared weights) as arrays, used in predict
         self.snapshot_w = None
         self.hist_ws = list()
         self.iteration_id = 0
@@ -32,50 +59,71 @@ class MFGPE(BaseTLSurrogate):
             self.K = len(mf_hpo_data) - 1  # K is the number of low-fidelity groups
             self.w = [1. / self.K] * self.K + [0.]
             self.snapshot_w = self.w
+            self._update_weight_arrays()
         self.source_hpo_data = mf_hpo_data
         # Refit the base surrogates.
         self.build_source_surrogates(normalize=_scale_method)
+        self._source_pred_cache.clear()
+
+    def _get_source_pred_cache(self, X: np.ndarray):
+        """
+        Return the dict of cached base surrogate predictions on X, mapping surrogate index to (mu, var).
+        """
+        key = (X.shape, X.tobytes())
+        if key not in self._source_pred_cache:
+            if len(self._source_pred_cache) >= _source_pred_cache_size:
+                # Evict the oldest entry.
+                self._source_pred_cache.pop(next(iter(self._source_pred_cache)))
+            self._source_pred_cache[key] = dict()
+        return self._source_pred_cache[key]
 
     def predict_target_surrogate_cv(self, X, y):
-        k_fold_num = 5
-        _mu, _var = list(), list()
-
-        # Conduct K-fold cross validation.
-        kf = KFold(n_splits=k_fold_num)
-        idxs = list()
-        for train_idx, val_idx in kf.split(X):
-            idxs.extend(list(val_idx))
-            X_train, X_val, y_train, y_val = X[train_idx, :], X[val_idx, :], y[train_idx], y[val_idx]
-            model = self.build_single_surrogate(X_train, y_train, normalize_y=False)
-            mu, var = model.predict(X_val)
-            mu, var = mu.flatten(), var.flatten()
-            _mu.extend(list(mu))
-            _var.extend(list(var))
-        assert (np.array(idxs) == np.arange(X.shape[0])).all()
-        return np.asarray(_mu), np.asarray(_var)
+        sample_num = X.shape[0]
+        k_fold_num = 5 if sample_num >= 15 else min(3, sample_num // 2)
+
+        # Conduct K-fold cross validation on contiguous folds (same splits as sklearn's KFold without shuffle).
+        # The folds are independent, so fit them in parallel.
+        idx = np.arange(sample_num)
+        val_idxs = np.array_split(idx, k_fold_num)
+        train_idxs = [np.setdiff1d(idx, val_idx) for val_idx in val_idxs]
+        n_jobs = min(k_fold_num, cpu_count())
+        fold_results = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_predict_fold)(self.surrogate_type, self.config_space, self.random_seed,
+                                       X[train_idx, :], y[train_idx], X[val_idx, :])
+            for train_idx, val_idx in zip(train_idxs, val_idxs))
+
+        _mu, _var = np.empty(sample_num), np.empty(sample_num)
+        for val_idx, (mu, var) in zip(val_idxs, fold_results):
+            _mu[val_idx], _var[val_idx] = mu, var
+        return _mu, _var
 
     def train(self, X: np.ndarray, y: np.array, **kwargs):
         snapshot_weight = kwargs.get('snapshot', True)
         if snapshot_weight:
             self.w = self.snapshot_w
         sample_num = y.shape[0]
+        self._source_pred_cache.clear()
 
         if self.source_hpo_data is None:
             raise ValueError('Source HPO data is None!')
 
-        # Get the predictions of low-fidelity surrogates
-        mu_list, var_list = list(), list()
-        for id in range(self.K):
-            mu, var = self.source_surrogates[id].predict(X)
-            mu_list.append(mu.flatten())
-            var_list.append(var.flatten())
+        # The product of experts weights surrogates by their predictive variances, so no weights are learned.
+        if self.fusion_method == 'gpoe':
+            return
+
+        # Evaluate the generalization of the high-fidelity surrogate via CV.
+        if sample_num >= 5 and not self._target_weight_converged():
+            # Predictions of all base surrogates, one row per surrogate.
+            mu_array = np.empty((self.K + 1, sample_num))
 
-        # Evaluate the generalization of the high-fidelity surrogate via CV
-        if sample_num >= 5:
-            _mu, _var = self.predict_target_surrogate_cv(X, y)
-            mu_list.append(_mu)
-            var_list.append(_var)
-            self.w = self.get_w_ranking_pairs(mu_list, var_list, y)
+            # Get the predictions of low-fidelity surrogates
+            for id in range(self.K):
+                mu, _ = self.source_surrogates[id].predict(X)
+                mu_array[id] = mu.reshape(-1)
+
+            mu_array[self.K], _ = self.predict_target_surrogate_cv(X, y)
+            self.w = self.get_w_ranking_pairs(mu_array, y)
+        self._update_weight_arrays()
 
         if snapshot_weight:
             self.snapshot_w = self.w
@@ -86,27 +134,47 @@ class MFGPE(BaseTLSurrogate):
             self.iteration_id += 1
             self.hist_ws.append(self.snapshot_w)
 
-    def get_w_ranking_pairs(self, mu_list, var_list, y_true):
-        preserving_order_p, preserving_order_nums = list(), list()
-        for i in range(self.K + 1):
-            y_pred = mu_list[i]
-            preorder_num, pair_num = self.calculate_preserving_order_num(y_pred, y_true)
-            preserving_order_p.append(preorder_num / pair_num)
-            preserving_order_nums.append(preorder_num)
+    def _target_weight_converged(self):
+        if len(self.hist_ws) < _skip_cv_window or self.iteration_id % _skip_cv_refresh_interval == 0:
+            return False
+        return all(w[-1] > _skip_cv_target_weight for w in self.hist_ws[-_skip_cv_window:])
+
+    def get_w_ranking_pairs(self, mu_array, y_true):
+        preorder_nums = np.array([self.calculate_preserving_order_num(y_pred, y_true)[0] for y_pred in mu_array])
+        pair_num = len(y_true) * (len(y_true) - 1) // 2
         n_power = 3
-        trans_order_weight = np.array(preserving_order_p)
-        p_power = np.power(trans_order_weight, n_power)
+        p_power = np.power(preorder_nums / pair_num, n_power)
         return p_power / np.sum(p_power)
 
+    def _update_weight_arrays(self):
+        self._W = np.asarray(self.w, dtype=np.float64)
+        self._W2 = self._W ** 2
+
     def predict(self, X: np.array):
         sample_num = X.shape[0]
-        mu, var = np.zeros((sample_num, 1)), np.zeros((sample_num, 1))
-
-        # Base surrogate predictions with corresponding weights.
-        for i in range(self.K + 1):
-            mu_t, var_t = self.source_surrogates[i].predict(X)
-            mu += self.w[i] * mu_t
-            var += self.w[i] * self.w[i] * var_t
+        if self.fusion_method == 'gpoe':
+            surrogate_ids = np.arange(self.K + 1)
+        else:
+            # Surrogates with zero weight (e.g. the high-fidelity one before CV is possible) do not contribute.
+            surrogate_ids = np.flatnonzero(self._W)
+
+        # Stack base surrogate predictions as rows, then combine them with one matrix product.
+        MU, VAR = np.empty((len(surrogate_ids), sample_num)), np.empty((len(surrogate_ids), sample_num))
+        pred_cache = self._get_source_pred_cache(X)
+        for row, i in enumerate(surrogate_ids):
+            if i not in pred_cache:
+                pred_cache[i] = self.source_surrogates[i].predict(X)
+            mu_t, var_t = pred_cache[i]
+            MU[row], VAR[row] = mu_t.reshape(-1), var_t.reshape(-1)
+
+        if self.fusion_method == 'gpoe':
+            precision = 1. / np.maximum(VAR, self.var_threshold)
+            var = 1. / np.sum(precision, axis=0)
+            mu = np.sum(precision * MU, axis=0) * var
+            return mu.reshape(-1, 1), var.reshape(-1, 1)
+
+        mu = (self._W[surrogate_ids] @ MU).reshape(-1, 1)
+        var = (self._W2[surrogate_ids] @ VAR).reshape(-1, 1)
         return mu, var
 
     def get_weights(self):
@@ -116,11 +184,21 @@ class MFGPE(BaseTLSurrogate):
     def calculate_preserving_order_num(y_pred, y_true):
         array_size = len(y_pred)
         assert len(y_true) == array_size
-
-        total_pair_num, order_preserving_num = 0, 0
-        for idx in range(array_size):
-            for inner_idx in range(idx + 1, array_size):
-                if not ((y_true[idx] > y_true[inner_idx]) ^ (y_pred[idx] > y_pred[inner_idx])):
-                    order_preserving_num += 1
-                total_pair_num += 1
+        # NaN compares False with everything, which cannot be expressed as a rank.
+        assert not (np.isnan(y_pred).any() or np.isnan(y_true).any()), 'y_pred and y_true must not contain NaN.'
+
+        total_pair_num = array_size * (array_size - 1) // 2
+        if total_pair_num == 0:
+            return 0, total_pair_num
+
+        # For non-NaN values and i < j, (y[i] > y[j]) equals ((y[i], i) > (y[j], j)). Ranking both arrays with
+        # ties broken by index thus keeps the pairwise comparison exact (pairs tied in both arrays are preserved)
+        # and removes all ties.
+        idx = np.arange(array_size)
+        pred_rank, true_rank = np.empty(array_size, dtype=int), np.empty(array_size, dtype=int)
+        pred_rank[np.lexsort((idx, y_pred))] = idx
+        true_rank[np.lexsort((idx, y_true))] = idx
+        # Without ties, the number of concordant pairs is (1 + tau) / 2 * total_pair_num. Computed in O(N log N).
+        tau = kendalltau(pred_rank, true_rank)[0]
+        order_preserving_num = int(round((tau + 1) / 2 * total_pair_num))
         return order_preserving_num, total_pair_num
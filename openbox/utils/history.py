@@ -137,6 +137,8 @@ class History(object):
 
         self.observations = []
         self.global_start_time = datetime.now()
+        # transform -> (observation list, number of converted observations, config array)
+        self._config_array_cache = dict()
 
         # multi-objective
         self._ref_point = None
@@ -292,13 +294,27 @@ class History(object):
         config_array: np.ndarray
             Configuration array. Shape: (n_configs, n_dims)
         """
-        if transform == 'scale':
-            return convert_configurations_to_array(self.configurations)
-        elif transform == 'numerical':
-            return np.array([get_config_numerical_values(config) for config in self.configurations])
-        else:
+        if transform not in ['scale', 'numerical']:
             raise ValueError(f'Unknown transform method: {transform}')
 
+        # Observations are only appended, so reuse the array and convert the newly added configurations.
+        n_obs = len(self.observations)
+        cached = self._config_array_cache.get(transform)
+        if cached is not None and cached[0] is self.observations and 0 < cached[1] <= n_obs:
+            _, n_converted, config_array = cached
+        else:
+            n_converted, config_array = 0, None
+
+        if config_array is None or n_converted < n_obs:
+            new_configs = [obs.config for obs in self.observations[n_converted:]]
+            if transform == 'scale':
+                new_array = convert_configurations_to_array(new_configs)
+            else:
+                new_array = np.array([get_config_numerical_values(config) for config in new_configs])
+            config_array = new_array if config_array is None else np.vstack([config_array, new_array])
+            self._config_array_cache[transform] = (self.observations, n_obs, config_array)
+        return config_array.copy()
+
     def get_config_dicts(self) -> List[dict]:
         """
         Get a list of configuration dictionaries.
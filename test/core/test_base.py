@@ -74,6 +74,11 @@ def test_build_surrogate(configspace_tiny, transfer_learning_history_single):
     transfer_learning_history = transfer_learning_history_single
     surrogate = build_surrogate('mfgpe', config_space, rng, transfer_learning_history)
     assert isinstance(surrogate, MFGPE)
+    assert surrogate.fusion_method == 'idp_lc'
+
+    surrogate = build_surrogate('mfgpe_gpoe', config_space, rng, transfer_learning_history)
+    assert isinstance(surrogate, MFGPE)
+    assert surrogate.fusion_method == 'gpoe'
 
     surrogate = build_surrogate('tlbo_rgpe_gp', config_space, rng, transfer_learning_history)
     assert isinstance(surrogate, RGPE)
@@ -1,6 +1,8 @@
 import pytest
 import numpy as np
 from unittest.mock import MagicMock, patch
+from ConfigSpace import Configuration
+from openbox import space as sp
 from openbox.core.generic_advisor import Advisor
 from openbox.utils.util_funcs import check_random_state
 from openbox.utils.history import Observation
@@ -41,3 +43,63 @@ def test_generic_advisor(configspace_tiny, history_single_obs):
 
     advisor.load_json("test/datas/test.json")
 
+
+def test_generic_advisor_max_min_distance(configspace_tiny):
+    config_space = configspace_tiny
+    advisor = Advisor(config_space)
+    default_config = config_space.get_default_configuration()
+    candidate_configs = advisor.sample_random_configs(config_space, 50)
+
+    # reference: greedy farthest-point selection
+    expected_configs = [default_config]
+    min_dis = np.array([np.linalg.norm(config.get_array() - default_config.get_array())
+                        for config in candidate_configs])
+    for _ in range(5):
+        furthest_config = candidate_configs[np.argmax(min_dis)]
+        expected_configs.append(furthest_config)
+        for j, config in enumerate(candidate_configs):
+            if config in expected_configs:
+                min_dis[j] = -1
+            else:
+                updated_dis = np.linalg.norm(config.get_array() - furthest_config.get_array())
+                min_dis[j] = min(updated_dis, min_dis[j])
+
+    initial_configs = advisor.max_min_distance(default_config, candidate_configs, 5)
+    assert initial_configs == expected_configs
+
+
+def test_generic_advisor_skip_duplicate_challengers(configspace_tiny):
+    config_space = configspace_tiny
+    advisor = Advisor(config_space, rand_prob=0)
+    for config in advisor.sample_random_configs(config_space, 5):
+        advisor.update_observation(Observation(config, [np.sum(config.get_array())], trial_state=SUCCESS))
+
+    evaluated_configs = advisor.history.configurations
+    duplicates = [Configuration(config_space, vector=config.get_array()) for config in evaluated_configs[::-1]]
+    new_config = advisor.sample_random_configs(config_space, 1, excluded_configs=evaluated_configs)[0]
+    advisor.acq_optimizer.maximize = MagicMock(return_value=duplicates + [new_config])
+    assert advisor.get_suggestion() == new_config
+
+
+def test_generic_advisor_skip_non_normalized_duplicate_challengers():
+    config_space = sp.Space(seed=0)
+    config_space.add_variables([sp.Int("x1", 0, 10, default_value=0), sp.Real("x2", 0, 1, default_value=0)])
+    advisor = Advisor(config_space, rand_prob=0)
+    for config in advisor.sample_random_configs(config_space, 5):
+        advisor.update_observation(Observation(config, [np.sum(config.get_array())], trial_state=SUCCESS))
+
+    # duplicates as built by the scipy maximizers: integer coordinates are not normalized
+    duplicates = []
+    for config in advisor.history.configurations:
+        for delta in (0.01, -0.01):
+            vector = config.get_array().copy()
+            vector[0] += delta
+            duplicate = Configuration(config_space, vector=vector)
+            if duplicate == config:
+                break
+        assert duplicate == config and duplicate.get_array().tobytes() != config.get_array().tobytes()
+        duplicates.append(duplicate)
+    new_config = advisor.sample_random_configs(config_space, 1,
+                                               excluded_configs=advisor.history.configurations)[0]
+    advisor.acq_optimizer.maximize = MagicMock(return_value=duplicates + [new_config])
+    assert advisor.get_suggestion() == new_config
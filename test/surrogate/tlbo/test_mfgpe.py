@@ -1,5 +1,6 @@
 import unittest
 import numpy as np
+from unittest.mock import patch
 from openbox.surrogate.tlbo.mfgpe import MFGPE
 from openbox.utils.history import History, Observation
 from openbox import space as sp
@@ -52,6 +53,88 @@ class MFGPESurrogateTests(unittest.TestCase):
         self.assertEqual(mu.shape, (4, 1))
         self.assertEqual(var.shape, (4, 1))
 
+    def test_check_mfgpe_predict_skips_zero_weight(self):
+        self.mfgpe.update_mf_trials(self.source_hpo_data)
+        self.assertEqual(self.mfgpe.w, [1., 0.])
+        X_test = np.array([[0.2], [0.4], [0.6], [0.8]])
+        mu, var = self.mfgpe.predict(X_test)
+        mu_0, var_0 = self.mfgpe.source_surrogates[0].predict(X_test)
+        np.testing.assert_allclose(mu, mu_0)
+        np.testing.assert_allclose(var, var_0)
+        self.assertEqual(list(self.mfgpe._get_source_pred_cache(X_test)), [0])
+
+    def test_check_mfgpe_predict_gpoe(self):
+        mfgpe = MFGPE(self.config_space, self.source_hpo_data, self.seed, surrogate_type=self.surrogate_type,
+                      num_src_hpo_trial=self.num_src_hpo_trial, fusion_method='gpoe')
+        mfgpe.update_mf_trials(self.source_hpo_data)
+        X_train = np.array([[0.1], [0.3], [0.5], [0.7], [0.9]])
+        y_train = np.array([0.2, 0.4, 0.6, 0.8, 1.0])
+        mfgpe.train(X_train, y_train)
+        self.assertEqual(mfgpe.w, [1., 0.])  # weights are not learned via CV
+        self.assertEqual(mfgpe.hist_ws, [])
+        self.assertEqual(mfgpe.target_weight, [])
+        X_test = np.array([[0.2], [0.4], [0.6], [0.8]])
+        mu, var = mfgpe.predict(X_test)
+        self.assertEqual(mu.shape, (4, 1))
+        self.assertEqual(var.shape, (4, 1))
+
+        preds = [mfgpe.source_surrogates[i].predict(X_test) for i in range(mfgpe.K + 1)]
+        expected_var = 1. / sum(1. / var_i for _, var_i in preds)
+        expected_mu = expected_var * sum(mu_i / var_i for mu_i, var_i in preds)
+        np.testing.assert_allclose(var, expected_var)
+        np.testing.assert_allclose(mu, expected_mu)
+
+    def test_check_mfgpe_target_weight_converged(self):
+        self.assertFalse(self.mfgpe._target_weight_converged())
+        self.mfgpe.hist_ws = [[0.05, 0.95]] * 3
+        self.mfgpe.iteration_id = 3
+        self.assertTrue(self.mfgpe._target_weight_converged())
+        self.mfgpe.iteration_id = 5  # periodic refresh
+        self.assertFalse(self.mfgpe._target_weight_converged())
+        self.mfgpe.hist_ws = [[0.05, 0.95], [0.2, 0.8], [0.05, 0.95]]
+        self.mfgpe.iteration_id = 3
+        self.assertFalse(self.mfgpe._target_weight_converged())
+
+    def test_check_mfgpe_train_skips_cv_when_converged(self):
+        self.mfgpe.update_mf_trials(self.source_hpo_data)
+        converged_w = [0.05, 0.95]
+        self.mfgpe.hist_ws = [converged_w] * 3
+        self.mfgpe.snapshot_w = converged_w
+        self.mfgpe.iteration_id = 3
+        X_train = np.array([[0.1], [0.3], [0.5], [0.7], [0.9]])
+        y_train = np.array([0.2, 0.4, 0.6, 0.8, 1.0])
+
+        with patch.object(self.mfgpe, 'predict_target_surrogate_cv',
+                          wraps=self.mfgpe.predict_target_surrogate_cv) as mock_cv:
+            self.mfgpe.train(X_train, y_train)
+            mock_cv.assert_not_called()
+            self.assertEqual(self.mfgpe.w, converged_w)
+
+            self.mfgpe.train(X_train, y_train)  # iteration 4
+            mock_cv.assert_not_called()
+
+            self.mfgpe.train(X_train, y_train)  # iteration 5, periodic refresh
+            mock_cv.assert_called_once()
+            self.assertNotEqual(list(self.mfgpe.w), converged_w)
+
+    def test_check_mfgpe_invalid_fusion_method(self):
+        with self.assertRaises(ValueError):
+            MFGPE(self.config_space, self.source_hpo_data, self.seed, fusion_method='invalid')
+
+    def test_check_mfgpe_source_prediction_cache(self):
+        X_train = np.array([[0.1], [0.3], [0.5], [0.7], [0.9]])
+        y_train = np.array([0.2, 0.4, 0.6, 0.8, 1.0])
+        self.mfgpe.train(X_train, y_train)
+        X_test = np.array([[0.2], [0.4], [0.6], [0.8]])
+        mu1, var1 = self.mfgpe.predict(X_test)
+        n_cached = len(self.mfgpe._source_pred_cache)
+        mu2, var2 = self.mfgpe.predict(X_test)
+        self.assertEqual(len(self.mfgpe._source_pred_cache), n_cached)
+        np.testing.assert_array_equal(mu1, mu2)
+        np.testing.assert_array_equal(var1, var2)
+        self.mfgpe.train(X_train, y_train)
+        self.assertEqual(len(self.mfgpe._source_pred_cache), 0)
+
     def test_check_mfgpe_update_mf_trials(self):
         config_space = ConfigurationSpace()
         config_space.add_hyperparameter(sp.Real("x1", 0, 1, default_value=0))
@@ -80,6 +163,28 @@ class MFGPESurrogateTests(unittest.TestCase):
         weights = self.mfgpe.get_weights()
         self.assertEqual(weights, self.mfgpe.w)
 
+    def test_check_mfgpe_calculate_preserving_order_num(self):
+        rng = np.random.RandomState(1)
+        y_pred = rng.randint(0, 5, 30).astype(float)
+        y_true = rng.randint(0, 5, 30).astype(float)
+        expected_num, expected_pair_num = 0, 0
+        for i in range(30):
+            for j in range(i + 1, 30):
+                if (y_true[i] > y_true[j]) == (y_pred[i] > y_pred[j]):
+                    expected_num += 1
+                expected_pair_num += 1
+        preorder_num, pair_num = MFGPE.calculate_preserving_order_num(y_pred, y_true)
+        self.assertEqual(preorder_num, expected_num)
+        self.assertEqual(pair_num, expected_pair_num)
+
+        # perfect ranking with tied (e.g. failed) observations, and a constant predictor
+        y_true = np.array([0, 1, 2, 3, 4, 9, 9, 9, 9, 9], dtype=float)
+        self.assertEqual(MFGPE.calculate_preserving_order_num(np.arange(10), y_true), (45, 45))
+        self.assertEqual(MFGPE.calculate_preserving_order_num(np.zeros(10), y_true), (45, 45))
+
+        with self.assertRaises(AssertionError):
+            MFGPE.calculate_preserving_order_num(np.array([1, np.nan, 0, 2]), np.array([0, 1, 2, 3]))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
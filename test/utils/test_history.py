@@ -222,6 +222,14 @@ class TestHistory:
         assert config_array.shape == (2, 2)
         assert np.all(config_array == config_array.astype(float))
 
+        # the cached array is extended with new observations
+        config3 = config_space.sample_configuration()
+        observation3 = Observation(config3, [0.3, 0.4], trial_state=SUCCESS, elapsed_time=2.0, extra_info={})
+        history_double.update_observation(observation3)
+        config_array = history_double.get_config_array(transform='scale')
+        assert config_array.shape == (3, 2)
+        assert np.all(config_array[2] == config3.get_array())
+
     def test_get_config_dicts(self, history_double, configspace_tiny):
         config_space = configspace_tiny
         config = config_space.sample_configuration()